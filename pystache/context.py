@@ -34,6 +34,32 @@ class NotFound(object):
 _NOT_FOUND = NotFound()
 
 
+# Maps a name to the list of its dot-separated parts.  The names queried
+# during rendering come from template tags, so the same few names recur on
+# every render; caching the split avoids re-splitting them each time.  The
+# cache is cleared when it reaches the maximum size to keep memory use
+# bounded.
+_split_name_cache = {}
+_SPLIT_NAME_CACHE_MAX_SIZE = 1000
+
+
+def _split_name(name):
+    """
+    Split a dotted name into its parts, and return them as a list.
+
+    """
+    # Include the string type in the key: equal str and unicode names
+    # hash alike, but the parts must preserve the original string type.
+    key = (type(name), name)
+    parts = _split_name_cache.get(key)
+    if parts is None:
+        parts = name.split('.')
+        if len(_split_name_cache) >= _SPLIT_NAME_CACHE_MAX_SIZE:
+            _split_name_cache.clear()
+        _split_name_cache[key] = parts
+    return parts
+
+
 def _get_value(context, key):
     """
     Retrieve a key's value from a context item.
@@ -185,16 +211,22 @@ class ContextStack(object):
 
         context = ContextStack()
 
+        # Operate on the underlying list directly: push() is a plain
+        # append, and skipping the method dispatch keeps this factory
+        # cheap since it runs once per render() call.  Note that items
+        # are added by reference; no copies are made, and the kwargs
+        # dictionary is added only when non-empty.
+        stack = context._stack
         for item in items:
             if item is None:
                 continue
             if isinstance(item, ContextStack):
-                context._stack.extend(item._stack)
+                stack.extend(item._stack)
             else:
-                context.push(item)
+                stack.append(item)
 
         if kwargs:
-            context.push(kwargs)
+            stack.append(kwargs)
 
         return context
 
@@ -275,7 +307,15 @@ class ContextStack(object):
             except IndexError:
                 raise KeyNotFoundError(".", "empty context stack")
 
-        parts = name.split('.')
+        # Non-dotted names (the common case) need no split and no loop
+        # over the remaining parts.
+        if '.' not in name:
+            try:
+                return self._get_simple(name)
+            except KeyNotFoundError:
+                raise KeyNotFoundError(name, "first part")
+
+        parts = _split_name(name)
 
         try:
             result = self._get_simple(parts[0])
@@ -8,12 +8,6 @@ does not otherwise specify a value.
 
 """
 
-try:
-    # Python 3.2 adds html.escape() and deprecates cgi.escape().
-    from html import escape
-except ImportError:
-    from cgi import escape
-
 import os
 import sys
 
@@ -52,14 +46,38 @@ SEARCH_DIRS = [os.curdir]  # i.e. ['.']
 # rendering templates (e.g. for tags enclosed in double braces).
 # Only unicode strings will be passed to this function.
 #
-# The quote=True argument causes double but not single quotes to be escaped
-# in Python 3.1 and earlier, and both double and single quotes to be
-# escaped in Python 3.2 and later:
+# The translation table below escapes the same characters as the escape
+# functions used previously (cgi.escape with quote=True, or html.escape
+# on Python 3.2 and later, which also escapes single quotes), but in a
+# single pass over the string instead of one replace() pass -- and hence
+# one intermediate string -- per special character:
 #
 #   http://docs.python.org/library/cgi.html#cgi.escape
 #   http://docs.python.org/dev/library/html.html#html.escape
 #
-TAG_ESCAPE = lambda u: escape(u, quote=True)
+_TAG_ESCAPE_TABLE = {
+    ord(u'&'): u'&amp;',
+    ord(u'<'): u'&lt;',
+    ord(u'>'): u'&gt;',
+    ord(u'"'): u'&quot;',
+}
+try:
+    # Python 3.2 adds html.escape() and deprecates cgi.escape().
+    import html
+except ImportError:
+    pass
+else:
+    _TAG_ESCAPE_TABLE[ord(u"'")] = u'&#x27;'
+
+def _tag_escape(u):
+    # The rendering process only passes unicode strings, but convert any
+    # other string here since, in Python 2, the dictionary form of the
+    # translation table works only with unicode.translate().
+    if not isinstance(u, unicode):
+        u = unicode(u)
+    return u.translate(_TAG_ESCAPE_TABLE)
+
+TAG_ESCAPE = _tag_escape
 
 # The default template extension, without the leading dot.
 TEMPLATE_EXTENSION = 'mustache'
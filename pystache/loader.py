@@ -37,6 +37,11 @@ class Loader(object):
 
     """
 
+    # Loader instances are created freely (e.g. one per render call), so
+    # use __slots__ to skip the per-instance attribute dictionary; this
+    # shrinks each instance and speeds up attribute access slightly.
+    __slots__ = ('extension', 'file_encoding', 'search_dirs', 'to_unicode')
+
     def __init__(self, file_encoding=None, extension=None, to_unicode=None,
                  search_dirs=None):
         """
@@ -6,6 +6,49 @@ Exposes a class that represents a parsed (or compiled) template.
 """
 
 
+# Parse trees longer than this many items fall back to the loop-based
+# renderer rather than being compiled to a specialized function, to keep
+# the generated source (and compile time) bounded.
+_MAX_COMPILE_ITEMS = 500
+
+
+def _compile_render(parse_tree):
+    """
+    Compile a parse tree to a specialized render function, and return it.
+
+    The returned function accepts an engine and a context and returns the
+    rendering as a single join over the parse tree's items: literal chunks
+    are referenced directly, and node objects are rendered by calling
+    their bound render methods.  Specializing in this way removes the
+    per-item type dispatch from the hot rendering loop.
+
+    Returns None if the parse tree is too large to compile.
+
+    """
+    if len(parse_tree) > _MAX_COMPILE_ITEMS:
+        return None
+
+    if not parse_tree:
+        return lambda engine, context: u''
+
+    namespace = {}
+    expressions = []
+    for index, item in enumerate(parse_tree):
+        name = '_node%d' % index
+        if type(item) is unicode:
+            namespace[name] = item
+            expressions.append(name)
+        else:
+            namespace[name] = item.render
+            expressions.append('%s(engine, context)' % name)
+
+    source = ("def _render(engine, context):\n"
+              "    return u''.join((%s,))\n" % ', '.join(expressions))
+    exec(source, namespace)
+
+    return namespace['_render']
+
+
 class ParsedTemplate(object):
 
     """
@@ -20,6 +63,14 @@ class ParsedTemplate(object):
 
     def __init__(self):
         self._parse_tree = []
+        # A flattened version of the parse tree for rendering: literal
+        # unicode chunks stay as is, and node objects are replaced by
+        # their bound render methods.  Computed lazily on first render.
+        self._render_items = None
+        # The compiled render function, computed lazily on first render.
+        # The False sentinel means compilation was attempted and declined
+        # (e.g. because the parse tree is too large).
+        self._render_func = None
 
     def __repr__(self):
         return repr(self._parse_tree)
@@ -33,18 +84,50 @@ class ParsedTemplate(object):
 
         """
         self._parse_tree.append(node)
+        self._render_items = None
+        self._render_func = None
 
     def render(self, engine, context):
         """
         Returns: a string of type unicode.
 
         """
-        # We avoid use of the ternary operator for Python 2.4 support.
-        def get_unicode(node):
-            if type(node) is unicode:
-                return node
-            return node.render(engine, context)
-        parts = map(get_unicode, self._parse_tree)
-        s = ''.join(parts)
-
-        return unicode(s)
+        # Parsed templates are cached and rendered repeatedly, so on first
+        # render we specialize a function to this template's exact shape
+        # (see _compile_render() above) and reuse it afterwards.
+        render_func = self._render_func
+        if render_func is None:
+            render_func = _compile_render(self._parse_tree)
+            if render_func is None:
+                render_func = False
+            self._render_func = render_func
+        if render_func is not False:
+            return unicode(render_func(engine, context))
+
+        # Otherwise, fall back to interpreting the parse tree.  Most
+        # entries are plain unicode strings, so check for that case first
+        # and call only the node render methods, which are looked up once
+        # and reused across renders.
+        items = self._render_items
+        if items is None:
+            items = []
+            for node in self._parse_tree:
+                if type(node) is unicode:
+                    items.append(node)
+                else:
+                    items.append(node.render)
+            self._render_items = items
+
+        # The number of output fragments equals the number of items, so
+        # preallocate the list and assign by index rather than growing it
+        # with repeated appends (and the reallocations that implies).
+        parts = [None] * len(items)
+        index = 0
+        for item in items:
+            if type(item) is unicode:
+                parts[index] = item
+            else:
+                parts[index] = item(engine, context)
+            index += 1
+
+        return unicode(''.join(parts))
@@ -11,9 +11,27 @@ from pystache import defaults
 from pystache.parsed import ParsedTemplate
 
 
-END_OF_LINE_CHARACTERS = [u'\r', u'\n']
+# A frozenset for fast membership tests in the parse loop.
+END_OF_LINE_CHARACTERS = frozenset((u'\r', u'\n'))
 NON_BLANK_RE = re.compile(ur'^(.)', re.M)
 
+# Maps a (template, delimiters) pair to the ParsedTemplate instance from a
+# previous parse.  Rendering parses partials and lambda return values on
+# every use, so hot templates would otherwise be re-tokenized on every
+# render.  The cache is cleared when it reaches the maximum size to keep
+# memory use bounded.
+#
+# The cache is shared by all renderers and threads.  That is safe because
+# it is only touched through single get/set/clear dictionary operations
+# (atomic under the GIL), the cached trees are reachable only through
+# _parse_cached() below (the rendering path never mutates the trees it
+# gets from there), and a racing duplicate parse merely does redundant
+# work.  The public parse() function returns a fresh tree on every call
+# precisely so that callers can mutate the result (e.g. via the public
+# ParsedTemplate.add() method) without corrupting the cache.
+_parsed_cache = {}
+_PARSED_CACHE_MAX_SIZE = 500
+
 
 # TODO: add some unit tests for this.
 # TODO: add a test case that checks for spurious spaces.
@@ -37,15 +55,84 @@ def parse(template, delimiters=None):
     """
     if type(template) is not unicode:
         raise Exception("Template is not unicode: %s" % type(template))
+
+    return _parse(template, delimiters)
+
+
+def _parse_cached(template, delimiters=None):
+    """
+    Like parse(), but cache and reuse the resulting ParsedTemplate.
+
+    This is the entry point the rendering path uses.  The returned
+    instance may be shared with other callers, so it must not be mutated;
+    external callers that need an independent tree should call parse()
+    instead.
+
+    """
+    if type(template) is not unicode:
+        raise Exception("Template is not unicode: %s" % type(template))
+
+    if delimiters is None:
+        delimiters = defaults.DELIMITERS
+    cache_key = (template, tuple(delimiters))
+
+    parsed_template = _parsed_cache.get(cache_key)
+    if parsed_template is not None:
+        return parsed_template
+
+    parsed_template = _parse(template, delimiters)
+
+    if len(_parsed_cache) >= _PARSED_CACHE_MAX_SIZE:
+        _parsed_cache.clear()
+    _parsed_cache[cache_key] = parsed_template
+
+    return parsed_template
+
+
+def _parse(template, delimiters):
+    """
+    Parse a template and return a new ParsedTemplate instance.
+
+    """
+    if delimiters is None:
+        delimiters = defaults.DELIMITERS
+
+    if delimiters[0] not in template:
+        # Then the template contains no tags, so skip the regex machinery
+        # entirely: a single containment check is much cheaper than
+        # searching the template for tags that are not there.
+        parsed_template = ParsedTemplate()
+        if template:
+            parsed_template.add(template)
+        return parsed_template
+
     parser = _Parser(delimiters)
     return parser.parse(template)
 
 
+# Maps a delimiter pair to the corresponding compiled tag regular
+# expression.  Compiling the verbose tag pattern is relatively expensive,
+# and the same few delimiter pairs recur across templates and across
+# repeated parses of the same template, so we compile each pair only once.
+# Delimiter pairs can come from {{=...=}} tags in untrusted templates, so
+# the cache is cleared when it reaches the maximum size to keep memory
+# use bounded, as with the parsed-template cache above.
+_template_re_cache = {}
+_TEMPLATE_RE_CACHE_MAX_SIZE = 100
+
+
 def _compile_template_re(delimiters):
     """
     Return a regular expression object (re.RegexObject) instance.
 
     """
+    # Delimiters can arrive as a list (e.g. from a {{=| |=}} tag), so
+    # normalize to a tuple for use as a dictionary key.
+    delimiters = tuple(delimiters)
+    template_re = _template_re_cache.get(delimiters)
+    if template_re is not None:
+        return template_re
+
     # The possible tag type characters following the opening tag,
     # excluding "=" and "{".
     tag_types = "!>&/#^"
@@ -55,18 +142,37 @@ def _compile_template_re(delimiters):
     #   The tag's content MUST be a non-whitespace character sequence
     #   NOT containing the current closing delimiter.
     #
-    tag = r"""
-        (?P<whitespace>[\ \t]*)
-        %(otag)s \s*
-        (?:
-          (?P<change>=) \s* (?P<delims>.+?)   \s* = |
-          (?P<raw>{)    \s* (?P<raw_name>.+?) \s* } |
-          (?P<tag>[%(tag_types)s]?)  \s* (?P<tag_key>[\s\S]+?)
-        )
-        \s* %(ctag)s
-    """ % {'tag_types': tag_types, 'otag': re.escape(delimiters[0]), 'ctag': re.escape(delimiters[1])}
+    # The pattern is a single compact string (rather than a re.VERBOSE
+    # pattern) so the regex engine has no comment/whitespace stripping to
+    # do, and the alternation shares the leading-whitespace and opening
+    # delimiter prefix so only the tag body is explored per branch.
+    #
+    # The groups are positional rather than named; the parse loop unpacks
+    # match.groups() in this order:
+    #
+    #   (whitespace, change, delims, raw, raw_name, tag, tag_key)
+    #
+    tag = (r'([ \t]*)'
+           r'%(otag)s\s*'
+           r'(?:'
+           r'(=)\s*(.+?)\s*='
+           r'|(\{)\s*(.+?)\s*\}'
+           r'|([%(tag_types)s]?)\s*([\s\S]+?)'
+           r')'
+           r'\s*%(ctag)s'
+           ) % {'tag_types': tag_types, 'otag': re.escape(delimiters[0]), 'ctag': re.escape(delimiters[1])}
+
+    template_re = re.compile(tag)
+    if len(_template_re_cache) >= _TEMPLATE_RE_CACHE_MAX_SIZE:
+        _template_re_cache.clear()
+    _template_re_cache[delimiters] = template_re
+
+    return template_re
 
-    return re.compile(tag, re.VERBOSE)
+
+# Seed the cache for the package default delimiters at import time, since
+# virtually every parse uses them.
+_compile_template_re(defaults.DELIMITERS)
 
 
 class ParsingError(Exception):
@@ -146,8 +252,10 @@ class _PartialNode(object):
 
     def render(self, engine, context):
         template = engine.resolve_partial(self.key)
-        # Indent before rendering.
-        template = re.sub(NON_BLANK_RE, self.indent + ur'\1', template)
+        # Indent before rendering.  An empty indent would substitute every
+        # line with itself, so skip the regex pass in that common case.
+        if self.indent:
+            template = NON_BLANK_RE.sub(self.indent + ur'\1', template)
 
         return engine.render(template, context)
 
@@ -184,14 +292,25 @@ class _SectionNode(object):
         self.template = template
         self.index_begin = index_begin
         self.index_end = index_end
+        # The raw section contents, precomputed here so rendering a lambda
+        # value does not re-slice the enclosing template on every render.
+        self.section_source = template[index_begin:index_end]
 
     def __repr__(self):
-        return _format(self, exclude=['delimiters', 'template'])
+        return _format(self, exclude=['delimiters', 'template', 'section_source'])
 
     def render(self, engine, context):
         values = engine.fetch_section_data(context, self.key)
 
+        # Hoist the bound methods out of the loop: a section over a large
+        # list otherwise pays an attribute lookup per push, pop, render,
+        # and append on every iteration.
         parts = []
+        append = parts.append
+        push = context.push
+        pop = context.pop
+        render_parsed = self.parsed.render
+
         for val in values:
             if callable(val):
                 # Lambdas special case section rendering and bypass pushing
@@ -209,14 +328,14 @@ class _SectionNode(object):
                 #   https://github.com/defunkt/pystache/issues/113
                 #
                 # TODO: should we check the arity?
-                val = val(self.template[self.index_begin:self.index_end])
+                val = val(self.section_source)
                 val = engine._render_value(val, context, delimiters=self.delimiters)
-                parts.append(val)
+                append(val)
                 continue
 
-            context.push(val)
-            parts.append(self.parsed.render(engine, context))
-            context.pop()
+            push(val)
+            append(render_parsed(engine, context))
+            pop()
 
         return unicode(''.join(parts))
 
@@ -264,75 +383,89 @@ class _Parser(object):
 
         states = []
 
-        while True:
-            match = self._template_re.search(template, start_index)
+        # Hoist loop invariants out of the tag-processing loop.
+        template_length = len(template)
+        end_of_line_characters = END_OF_LINE_CHARACTERS
 
-            if match is None:
+        # Consume the tags from a finditer() iterator rather than calling
+        # search() with an explicit start position for each tag: the
+        # iterator keeps its scan position internally, avoiding one regex
+        # VM re-entry per tag.  The iterator needs rebuilding only in the
+        # uncommon case that a {{=...=}} tag changes the delimiters (and
+        # with them the compiled pattern).
+        while True:
+            template_re = self._template_re
+            did_delimiters_change = False
+
+            for match in template_re.finditer(template, start_index):
+                match_index = match.start()
+                end_index = match.end()
+
+                # Unpack the positional groups into locals and normalize,
+                # avoiding a groupdict() dictionary allocation per tag.
+                (leading_whitespace, change, delims, raw, raw_name,
+                 tag_type, tag_key) = match.groups()
+
+                if change is not None:
+                    tag_type, tag_key = '=', delims
+                elif raw is not None:
+                    tag_type, tag_key = '&', raw_name
+
+                # Standalone (non-interpolation) tags consume the entire line,
+                # both leading whitespace and trailing newline.
+                did_tag_begin_line = match_index == 0 or template[match_index - 1] in end_of_line_characters
+                did_tag_end_line = end_index == template_length or template[end_index] in end_of_line_characters
+                is_tag_interpolating = tag_type in ('', '&')
+
+                if did_tag_begin_line and did_tag_end_line and not is_tag_interpolating:
+                    if end_index < template_length and template[end_index] == '\r':
+                        end_index += 1
+                    if end_index < template_length and template[end_index] == '\n':
+                        end_index += 1
+                elif leading_whitespace:
+                    match_index += len(leading_whitespace)
+                    leading_whitespace = ''
+
+                # Avoid adding spurious empty strings to the parse tree.
+                if start_index != match_index:
+                    parsed_template.add(template[start_index:match_index])
+
+                start_index = end_index
+
+                if tag_type in ('#', '^'):
+                    # Cache current state.
+                    state = (tag_type, end_index, section_key, parsed_template)
+                    states.append(state)
+
+                    # Initialize new state
+                    section_key, parsed_template = tag_key, ParsedTemplate()
+                    continue
+
+                if tag_type == '/':
+                    if tag_key != section_key:
+                        raise ParsingError("Section end tag mismatch: %s != %s" % (tag_key, section_key))
+
+                    # Restore previous state with newly found section data.
+                    parsed_section = parsed_template
+
+                    (tag_type, section_start_index, section_key, parsed_template) = states.pop()
+                    node = self._make_section_node(template, tag_type, tag_key, parsed_section,
+                                                   section_start_index, match_index)
+
+                else:
+                    node = self._make_interpolation_node(tag_type, tag_key, leading_whitespace)
+
+                parsed_template.add(node)
+
+                if self._template_re is not template_re:
+                    did_delimiters_change = True
+                    break
+
+            if not did_delimiters_change:
                 break
 
-            match_index = match.start()
-            end_index = match.end()
-
-            matches = match.groupdict()
-
-            # Normalize the matches dictionary.
-            if matches['change'] is not None:
-                matches.update(tag='=', tag_key=matches['delims'])
-            elif matches['raw'] is not None:
-                matches.update(tag='&', tag_key=matches['raw_name'])
-
-            tag_type = matches['tag']
-            tag_key = matches['tag_key']
-            leading_whitespace = matches['whitespace']
-
-            # Standalone (non-interpolation) tags consume the entire line,
-            # both leading whitespace and trailing newline.
-            did_tag_begin_line = match_index == 0 or template[match_index - 1] in END_OF_LINE_CHARACTERS
-            did_tag_end_line = end_index == len(template) or template[end_index] in END_OF_LINE_CHARACTERS
-            is_tag_interpolating = tag_type in ['', '&']
-
-            if did_tag_begin_line and did_tag_end_line and not is_tag_interpolating:
-                if end_index < len(template):
-                    end_index += template[end_index] == '\r' and 1 or 0
-                if end_index < len(template):
-                    end_index += template[end_index] == '\n' and 1 or 0
-            elif leading_whitespace:
-                match_index += len(leading_whitespace)
-                leading_whitespace = ''
-
-            # Avoid adding spurious empty strings to the parse tree.
-            if start_index != match_index:
-                parsed_template.add(template[start_index:match_index])
-
-            start_index = end_index
-
-            if tag_type in ('#', '^'):
-                # Cache current state.
-                state = (tag_type, end_index, section_key, parsed_template)
-                states.append(state)
-
-                # Initialize new state
-                section_key, parsed_template = tag_key, ParsedTemplate()
-                continue
-
-            if tag_type == '/':
-                if tag_key != section_key:
-                    raise ParsingError("Section end tag mismatch: %s != %s" % (tag_key, section_key))
-
-                # Restore previous state with newly found section data.
-                parsed_section = parsed_template
-
-                (tag_type, section_start_index, section_key, parsed_template) = states.pop()
-                node = self._make_section_node(template, tag_type, tag_key, parsed_section,
-                                               section_start_index, match_index)
-
-            else:
-                node = self._make_interpolation_node(tag_type, tag_key, leading_whitespace)
-
-            parsed_template.add(node)
-
         # Avoid adding spurious empty strings to the parse tree.
-        if start_index != len(template):
+        if start_index != template_length:
             parsed_template.add(template[start_index:])
 
         return parsed_template
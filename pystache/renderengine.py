@@ -8,7 +8,7 @@ Defines a class responsible for rendering logic.
 import re
 
 from pystache.common import is_string
-from pystache.parser import parse
+from pystache.parser import _parse_cached
 
 
 def context_get(stack, name):
@@ -104,14 +104,17 @@ class RenderEngine(object):
         """
         val = self.resolve_context(context, name)
 
+        # Check the common case first: the resolved value is usually
+        # already a string, and strings are never callable, so the
+        # remaining checks can be skipped for them.
+        if is_string(val):
+            return val
+
         if callable(val):
             # Return because _render_value() is already a string.
             return self._render_value(val(), context)
 
-        if not is_string(val):
-            return self.to_str(val)
-
-        return val
+        return self.to_str(val)
 
     def fetch_section_data(self, context, name):
         """
@@ -157,10 +160,12 @@ class RenderEngine(object):
         Render an arbitrary value.
 
         """
-        if not is_string(val):
-            # In case the template is an integer, for example.
-            val = self.to_str(val)
+        # Values are usually already unicode, in which case neither the
+        # string coercion nor the literal conversion applies.
         if type(val) is not unicode:
+            if not is_string(val):
+                # In case the template is an integer, for example.
+                val = self.to_str(val)
             val = self.literal(val)
         return self.render(val, context, delimiters)
 
@@ -176,6 +181,10 @@ class RenderEngine(object):
           context_stack: a ContextStack instance.
 
         """
-        parsed_template = parse(template, delimiters)
+        # Use the caching variant of parse(): this method is called once
+        # per partial and per lambda return value, so hot templates recur
+        # here.  The cached trees are shared, but rendering never mutates
+        # them.
+        parsed_template = _parse_cached(template, delimiters)
 
         return parsed_template.render(self, context_stack)
@@ -5,6 +5,8 @@ This module provides a Renderer class to render templates.
 
 """
 
+import codecs
+import os
 import sys
 
 from pystache import defaults
@@ -17,6 +19,36 @@ from pystache.specloader import SpecLoader
 from pystache.template_spec import TemplateSpec
 
 
+# The maximum number of file templates cached per Renderer instance by
+# render_path().  The cache is cleared when it reaches this size to keep
+# memory use bounded.
+_PATH_CACHE_MAX_SIZE = 1024
+
+# The byte-string types accepted by Renderer.unicode(), mirroring what
+# the built-in unicode() accepts for decoding: str and buffer in Python 2
+# (where bytes is str), and bytes after 2to3 conversion to Python 3
+# (which has no buffer type).  Note that 2to3 leaves "bytes" alone,
+# unlike "str", which it would rewrite to the text type.
+try:
+    _BYTES_TYPES = (bytes, buffer)
+except NameError:
+    _BYTES_TYPES = (bytes,)
+
+# Maps an encoding name to the codec's decode function.  Calling the
+# built-in unicode() looks the codec up in the registry on every call;
+# resolving the decode function once per encoding skips that lookup on
+# the hot decoding path.
+_decoders = {}
+
+
+def _get_decoder(encoding):
+    decoder = _decoders.get(encoding)
+    if decoder is None:
+        decoder = codecs.lookup(encoding).decode
+        _decoders[encoding] = decoder
+    return decoder
+
+
 class Renderer(object):
 
     """
@@ -134,6 +166,9 @@ class Renderer(object):
             search_dirs = [search_dirs]
 
         self._context = None
+        self._engine_cache = None
+        self._loader_cache = None
+        self._path_cache = {}
         self.decode_errors = decode_errors
         self.escape = escape
         self.file_encoding = file_encoding
@@ -186,7 +221,13 @@ class Renderer(object):
         Convert a basestring to a string with type unicode (not subclass).
 
         """
-        return unicode(self._to_unicode_soft(s))
+        s = self._to_unicode_soft(s)
+        # Skip the unicode() call (and the copy it implies) when the
+        # string already has exactly type unicode; the call is only
+        # needed to strip unicode subclasses.
+        if type(s) is unicode:
+            return s
+        return unicode(s)
 
     def _escape_to_unicode(self, s):
         """
@@ -195,7 +236,13 @@ class Renderer(object):
         Returns a unicode string (not subclass).
 
         """
-        return unicode(self.escape(self._to_unicode_soft(s)))
+        s = self.escape(self._to_unicode_soft(s))
+        # The default escape function already returns plain unicode, in
+        # which case the subclass-stripping unicode() call (and the copy
+        # it implies) can be skipped.  This runs once per escaped tag.
+        if type(s) is unicode:
+            return s
+        return unicode(s)
 
     def unicode(self, b, encoding=None):
         """
@@ -217,20 +264,44 @@ class Renderer(object):
               TypeError: decoding Unicode is not supported
 
         """
+        # Raise the same errors as the built-in unicode() does for unicode
+        # and other non-byte-string arguments; the codec decode functions
+        # used below are more permissive (e.g. they would return a unicode
+        # argument unchanged and would decode a bytearray).
+        if isinstance(b, unicode):
+            raise TypeError("decoding Unicode is not supported")
+        if not isinstance(b, _BYTES_TYPES):
+            raise TypeError("coercing to Unicode: need string or buffer, "
+                            "%s found" % type(b).__name__)
+
         if encoding is None:
             encoding = self.string_encoding
 
         # TODO: Wrap UnicodeDecodeErrors with a message about setting
         # the string_encoding and decode_errors attributes.
-        return unicode(b, encoding, self.decode_errors)
+        return _get_decoder(encoding)(b, self.decode_errors)[0]
 
     def _make_loader(self):
         """
         Create a Loader instance using current attributes.
 
         """
-        return Loader(file_encoding=self.file_encoding, extension=self.file_extension,
-                      to_unicode=self.unicode, search_dirs=self.search_dirs)
+        # Reuse the previous Loader while the attributes it was built
+        # from are unchanged, since loaders are otherwise created anew on
+        # every render and template load.  Bound methods compare equal
+        # across accesses, so the default unicode method does not defeat
+        # the comparison, while assigning renderer.unicode still takes
+        # effect.
+        key = (self.file_encoding, self.file_extension, self.search_dirs,
+               self.unicode)
+        cached = self._loader_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        loader = Loader(file_encoding=self.file_encoding, extension=self.file_extension,
+                        to_unicode=self.unicode, search_dirs=self.search_dirs)
+        self._loader_cache = (key, loader)
+        return loader
 
     def _make_load_template(self):
         """
@@ -253,20 +324,24 @@ class Renderer(object):
             return self._make_load_template()
 
         # Otherwise, create a function from the custom partial loader.
-        partials = self.partials
+        # Bind the lookup and conversion functions outside the closure so
+        # the hit path does not repeat the attribute lookups per call.
+        partials_get = self.partials.get
+        partials_type = type(self.partials)
+        to_unicode = self._to_unicode_hard
 
         def load_partial(name):
             # TODO: consider using EAFP here instead.
             #     http://docs.python.org/glossary.html#term-eafp
             #   This would mean requiring that the custom partial loader
             #   raise a KeyError on name not found.
-            template = partials.get(name)
+            template = partials_get(name)
             if template is None:
                 raise TemplateNotFoundError("Name %s not found in partials: %s" %
-                                            (repr(name), type(partials)))
+                                            (repr(name), partials_type))
 
             # RenderEngine requires that the return value be unicode.
-            return self._to_unicode_hard(template)
+            return to_unicode(template)
 
         return load_partial
 
@@ -291,15 +366,30 @@ class Renderer(object):
         """
         load_partial = self._make_load_partial()
 
-        if self._is_missing_tags_strict():
-            return load_partial
-        # Otherwise, ignore missing tags.
+        # A partial referenced inside a section loop is resolved once per
+        # iteration, so memoize loads for the lifetime of the engine
+        # (i.e. for a single render call).  Each partial is then located,
+        # read, and decoded at most once per render.
+        cache = {}
 
-        def resolve_partial(name):
-            try:
-                return load_partial(name)
-            except TemplateNotFoundError:
-                return u''
+        if self._is_missing_tags_strict():
+            def resolve_partial(name):
+                template = cache.get(name)
+                if template is None:
+                    template = load_partial(name)
+                    cache[name] = template
+                return template
+        else:
+            # Otherwise, ignore missing tags.
+            def resolve_partial(name):
+                template = cache.get(name)
+                if template is None:
+                    try:
+                        template = load_partial(name)
+                    except TemplateNotFoundError:
+                        template = u''
+                    cache[name] = template
+                return template
 
         return resolve_partial
 
@@ -325,14 +415,42 @@ class Renderer(object):
         Return a RenderEngine instance for rendering.
 
         """
+        # The engine's closures freeze the attributes below when they are
+        # created, so the engine can be reused across render() calls as
+        # long as none of them has been rebound since.  The remaining
+        # attributes (e.g. escape and string_encoding) are read through
+        # bound methods at render time and so stay live either way.
+        key = (self.missing_tags, self.partials, self.file_encoding,
+               self.file_extension, self.search_dirs)
+
+        cached = self._engine_cache
+        if cached is not None:
+            old_key = cached[0]
+            index = 0
+            while index < len(key) and old_key[index] is key[index]:
+                index += 1
+            if index == len(key):
+                engine = cached[1]
+                # The partial-load memo is scoped to a single render, so
+                # refresh the resolver when reusing the engine.
+                engine.resolve_partial = self._make_resolve_partial()
+                return engine
+
         resolve_context = self._make_resolve_context()
         resolve_partial = self._make_resolve_partial()
 
+        # Look str_coerce up at call time (rather than passing the bound
+        # method) so an assignment to the attribute takes effect even
+        # when the engine is reused.
+        def to_str(val):
+            return self.str_coerce(val)
+
         engine = RenderEngine(literal=self._to_unicode_hard,
                               escape=self._escape_to_unicode,
                               resolve_context=resolve_context,
                               resolve_partial=resolve_partial,
-                              to_str=self.str_coerce)
+                              to_str=to_str)
+        self._engine_cache = (key, engine)
         return engine
 
     # TODO: add unit tests for this method.
@@ -377,6 +495,36 @@ class Renderer(object):
         template = loader.load_name(template_name)
         return self._render_string(template, *context, **kwargs)
 
+    def _read_path(self, template_path):
+        """
+        Read the template at the given path, using an mtime-keyed cache.
+
+        Workloads like web servers render the same template files over
+        and over; caching the decoded file contents keyed on modification
+        time reduces a repeat read to a single stat() call.  The cached
+        value is invalidated when the file changes on disk or when the
+        relevant decoding attributes change.
+
+        """
+        try:
+            mtime = os.path.getmtime(template_path)
+        except OSError:
+            # Let the read raise the usual error for unreadable paths.
+            return self._make_loader().read(template_path)
+
+        key = (mtime, self.file_encoding, self.decode_errors)
+        entry = self._path_cache.get(template_path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        template = self._make_loader().read(template_path)
+
+        if len(self._path_cache) >= _PATH_CACHE_MAX_SIZE:
+            self._path_cache.clear()
+        self._path_cache[template_path] = (key, template)
+
+        return template
+
     def render_path(self, template_path, *context, **kwargs):
         """
         Render the template at the given path using the given context.
@@ -384,8 +532,7 @@ class Renderer(object):
         Read the render() docstring for more information.
 
         """
-        loader = self._make_loader()
-        template = loader.read(template_path)
+        template = self._read_path(template_path)
 
         return self._render_string(template, *context, **kwargs)
 
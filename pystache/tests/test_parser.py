@@ -8,7 +8,9 @@ Unit tests of parser.py.
 import unittest
 
 from pystache.defaults import DELIMITERS
+from pystache.parser import parse
 from pystache.parser import _compile_template_re as make_re
+from pystache.parser import _parse_cached
 
 
 class RegularExpressionTestCase(unittest.TestCase):
@@ -25,3 +27,44 @@ class RegularExpressionTestCase(unittest.TestCase):
 
         self.assertEqual(match.start(), 1)
 
+
+class ParseCacheTestCase(unittest.TestCase):
+
+    """Tests the parsed-template cache used by _parse_cached()."""
+
+    def test_parse_cached__returns_cached(self):
+        """
+        Check that parsing the same template twice reuses the parse tree.
+
+        """
+        parsed1 = _parse_cached(u"Hey {{name}}!")
+        parsed2 = _parse_cached(u"Hey {{name}}!")
+
+        self.assertTrue(parsed1 is parsed2)
+
+    def test_parse_cached__cache_distinguishes_delimiters(self):
+        """
+        Check that the cache does not mix up differing delimiters.
+
+        """
+        template = u"[[name]]"
+        parsed1 = _parse_cached(template)
+        parsed2 = _parse_cached(template, delimiters=(u'[[', u']]'))
+
+        self.assertFalse(parsed1 is parsed2)
+
+    def test_parse__returns_fresh_instances(self):
+        """
+        Check that the public parse() does not hand out cached trees.
+
+        Callers are free to mutate the parse trees they get from parse()
+        (e.g. via ParsedTemplate.add()), so each call must return an
+        independent instance.
+
+        """
+        _parse_cached(u"Hey {{name}}!")
+        parsed1 = parse(u"Hey {{name}}!")
+        parsed2 = parse(u"Hey {{name}}!")
+
+        self.assertFalse(parsed1 is parsed2)
+
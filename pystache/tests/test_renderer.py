@@ -7,10 +7,13 @@ Unit tests of template.py.
 
 import codecs
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from examples.simple import Simple
+from pystache import common
 from pystache import Renderer
 from pystache import TemplateSpec
 from pystache.common import TemplateNotFoundError
@@ -385,6 +388,71 @@ class RendererTests(unittest.TestCase, AssertStringMixin):
         actual = renderer.render_path(path, to='foo')
         self.assertEqual(actual, "Hello, foo")
 
+    def test_render_path__cache_hit(self):
+        """
+        Test that render_path() does not re-read an unchanged file.
+
+        """
+        renderer = Renderer()
+        path = get_data_path('say_hello.mustache')
+        self.assertEqual(renderer.render_path(path, to='foo'), "Hello, foo")
+
+        # A second render of the same unchanged file should come from the
+        # cache without touching the file system.
+        original_read = common.read
+        def failing_read(path):
+            raise AssertionError("file re-read on a cache hit")
+        common.read = failing_read
+        try:
+            actual = renderer.render_path(path, to='bar')
+        finally:
+            common.read = original_read
+        self.assertEqual(actual, "Hello, bar")
+
+    def test_render_path__cache_invalidation(self):
+        """
+        Test that render_path() re-reads a file whose mtime changed.
+
+        """
+        renderer = Renderer()
+        dir_path = tempfile.mkdtemp()
+        try:
+            path = os.path.join(dir_path, 'template.mustache')
+            f = open(path, 'w')
+            f.write('v1: {{thing}}')
+            f.close()
+            self.assertEqual(renderer.render_path(path, thing='foo'), "v1: foo")
+
+            f = open(path, 'w')
+            f.write('v2: {{thing}}')
+            f.close()
+            # Bump the mtime explicitly in case both writes land within
+            # the file system's timestamp granularity.
+            mtime = os.path.getmtime(path)
+            os.utime(path, (mtime + 10, mtime + 10))
+            self.assertEqual(renderer.render_path(path, thing='foo'), "v2: foo")
+        finally:
+            shutil.rmtree(dir_path)
+
+    def test_render_path__deleted_file(self):
+        """
+        Test that render_path() does not serve a deleted file from the cache.
+
+        """
+        renderer = Renderer()
+        dir_path = tempfile.mkdtemp()
+        try:
+            path = os.path.join(dir_path, 'template.mustache')
+            f = open(path, 'w')
+            f.write('v1: {{thing}}')
+            f.close()
+            self.assertEqual(renderer.render_path(path, thing='foo'), "v1: foo")
+
+            os.remove(path)
+            self.assertRaises(IOError, renderer.render_path, path)
+        finally:
+            shutil.rmtree(dir_path)
+
     def test_render__object(self):
         """
         Test rendering an object instance.